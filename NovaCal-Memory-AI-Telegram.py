@@ -1,11 +1,21 @@
 import os
-import json
+import re
+import time
+import asyncio
 import logging
+import functools
+import threading
 from datetime import datetime, timezone, timedelta
 
 # --- Third-Party Libraries ---
+import orjson
 from dotenv import load_dotenv
+from google.auth.exceptions import RefreshError
+from sqlalchemy import Index, create_engine
 from telegram import Update, constants
+from telegram.error import BadRequest
+from telegram.request import HTTPXRequest
+import telegramify_markdown
 from telegram.ext import ApplicationBuilder, ContextTypes, CommandHandler, MessageHandler, filters
 
 # --- LangChain & Generative AI Libraries ---
@@ -16,9 +26,20 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.tools import tool
 from langchain_community.chat_message_histories import SQLChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
+from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.exceptions import ModelAuthenticationError, ModelPermissionDeniedError, ModelRateLimitError
 
 # --- Custom Application Modules ---
-from function import get_id_of_schedules, get_all_schedules
+from function import get_id_of_schedules, get_all_schedules, clear_schedule_cache
+
+# --- Optional Performance Libraries ---
+# uvloop is a drop-in, faster event loop for asyncio. It is not available on Windows,
+# so the bot silently falls back to the standard asyncio loop when it is missing.
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # ==========================================
 # ENVIRONMENT VARIABLES & CONFIGURATION
@@ -28,14 +49,42 @@ load_dotenv()
 
 # Fetch configuration keys from environment variables
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN_Nova_cal_memory")
-TELEGRAM_DEVELOPER_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+# The developer's chat ID is parsed to an integer once, so access checks are exact numeric matches
+# (stray whitespace in the environment variable can no longer lock the developer out).
+TELEGRAM_DEVELOPER_CHAT_ID = int(os.getenv("TELEGRAM_CHAT_ID", "0").strip())
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
+# Webhook Mode Settings (Production).
+# When USE_WEBHOOK=1, Telegram pushes updates to this public HTTPS base URL instead of the bot long-polling for them.
+# Railway exposes the service domain as RAILWAY_PUBLIC_DOMAIN, which is used when WEBHOOK_URL is not set explicitly.
+USE_WEBHOOK = os.getenv("USE_WEBHOOK") == "1"
+RAILWAY_PUBLIC_DOMAIN = os.getenv("RAILWAY_PUBLIC_DOMAIN")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL") or (f"https://{RAILWAY_PUBLIC_DOMAIN}" if RAILWAY_PUBLIC_DOMAIN else None)
+
+# Fail fast: without a public URL, Telegram has nowhere to push the updates
+if USE_WEBHOOK and not WEBHOOK_URL:
+    raise RuntimeError("USE_WEBHOOK=1 requires a public HTTPS URL: set WEBHOOK_URL (or deploy on Railway with RAILWAY_PUBLIC_DOMAIN).")
+WEBHOOK_PORT = int(os.getenv("PORT", "8443"))
+WEBHOOK_SECRET = os.getenv("TG_WEBHOOK_SECRET")
+
+# Fixed UTC+7 offset used to stamp the agent's notion of "now" (WIB / Asia/Jakarta)
+WIB_TIMEZONE = timezone(timedelta(hours=7))
+
 # Establish the Database Connection URL.
 # PRIMARY: Attempts to fetch the production database URL (e.g., MySQL on Railway) from the environment.
 # FALLBACK: If no environment variable is found (e.g., running locally), it safely defaults to a local SQLite database.
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///novacal_memory.db")
 
+# Create ONE shared SQLAlchemy engine (and therefore one connection pool) for every chat session.
+# 'pool_pre_ping' transparently replaces connections dropped by the server, and 'pool_recycle'
+# retires connections before MySQL's idle timeout can kill them.
+DB_ENGINE = create_engine(
+    DATABASE_URL,
+    pool_size=10,
+    pool_pre_ping=True,
+    pool_recycle=1800
+)
+
 # ==========================================
 # DYNAMIC CREDENTIAL GENERATOR FOR CLOUD DEPLOYMENT (RAILWAY)
 # ==========================================
@@ -44,17 +93,41 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///novacal_memory.db")
 # However, during cloud deployment (like on Railway), these files are typically ignored via .gitignore for security.
 # This script dynamically generates the required physical files on the server upon startup by pulling the raw JSON data from Railway's Environment Variables.
 
+def write_json_file_from_env(env_name: str, file_path: str) -> None:
+    """
+    Materializes a JSON credential file from an environment variable (if the file doesn't exist yet).
+
+    The payload is parsed once with 'orjson' and written back as raw bytes in a single call.
+    Parsing up front also validates it: a malformed variable fails loudly at boot instead of
+    surfacing later as a confusing Google authentication error on the first user message.
+
+    Args:
+        env_name (str): The environment variable holding the raw JSON content.
+        file_path (str): The physical file to generate (e.g., 'token.json').
+
+    Raises:
+        RuntimeError: If the environment variable does not contain a valid JSON object.
+    """
+    raw_json = os.getenv(env_name)
+    if not raw_json or os.path.exists(file_path):
+        return
+
+    try:
+        payload = orjson.loads(raw_json)
+    except orjson.JSONDecodeError as e:
+        raise RuntimeError(f"Environment variable '{env_name}' does not contain valid JSON: {e}") from e
+
+    if not isinstance(payload, dict):
+        raise RuntimeError(f"Environment variable '{env_name}' must contain a JSON object, got {type(payload).__name__}.")
+
+    with open(file_path, "wb") as f:
+        f.write(orjson.dumps(payload))
+
 # 1. Generate 'credentials.json' on the server if it doesn't exist
-creds_env = os.getenv("GOOGLE_CALENDAR_CREDENTIALS")
-if creds_env and not os.path.exists("credentials.json"):
-    with open("credentials.json", "w") as f:
-        f.write(creds_env)
+write_json_file_from_env("GOOGLE_CALENDAR_CREDENTIALS", "credentials.json")
 
 # 2. Generate 'token.json' on the server if it doesn't exist
-token_env = os.getenv("GOOGLE_CALENDAR_TOKEN")
-if token_env and not os.path.exists("token.json"):
-    with open("token.json", "w") as f:
-        f.write(token_env)
+write_json_file_from_env("GOOGLE_CALENDAR_TOKEN", "token.json")
 
 # ==========================================
 # SYSTEM LOGGING SETUP
@@ -80,12 +153,64 @@ class WindowedSQLChatMessageHistory(SQLChatMessageHistory):
     By overriding the `messages` property, the SQL database continues to store 100% of the conversation history 
     securely for auditing, but the AI Agent is strictly fed only the last N messages (e.g., the last 5 chat bubbles).
     """
+    # Number of most recent messages (chat bubbles) fed to the LLM agent
+    window_size = 5
+
     @property
     def messages(self):
-        # Fetches all records from the SQL database, but slicing limits the output 
-        # to the last 5 messages (conversational turns) sent to the LLM agent.
-        return super().messages[-5:]
+        # Push the sliding window down into SQL ('ORDER BY id DESC LIMIT 5') so only the newest rows
+        # cross the wire, no matter how long the stored conversation grows.
+        model = self.sql_model_class
+        with self.session_maker() as session:
+            records = (
+                session.query(model)
+                .where(getattr(model, self.session_id_field_name) == self.session_id)
+                .order_by(model.id.desc())
+                .limit(self.window_size)
+                .all()
+            )
+            # Flip the rows back into chronological order before handing them to the agent
+            return [self.converter.from_sql_model(record) for record in reversed(records)]
+
+    async def aget_messages(self):
+        # The parent class only supports async reads on an async SQL engine. Our engine is synchronous,
+        # so the blocking query (including the sliding window above) is offloaded to a worker thread.
+        return await asyncio.to_thread(lambda: self.messages)
+
+    async def aadd_messages(self, messages):
+        # Persist the new conversational turn on a worker thread for the same reason as above.
+        await asyncio.to_thread(self.add_messages, messages)
 
+# Tracks whether the composite (session_id, id) index has already been verified in this process
+SESSION_INDEX_READY = False
+
+def ensure_session_index(history: SQLChatMessageHistory) -> None:
+    """
+    Creates the composite (session_id, id) index on the chat history table exactly once per process.
+
+    The index turns the sliding-window query ('WHERE session_id = ? ORDER BY id DESC LIMIT 5')
+    into a short index range scan instead of a full table scan. 'checkfirst' makes this
+    safe to run against a database where the index already exists.
+
+    Args:
+        history (SQLChatMessageHistory): Any history instance bound to the target database.
+    """
+    global SESSION_INDEX_READY
+    if SESSION_INDEX_READY:
+        return
+
+    table = history.sql_model_class.__table__
+    session_column = table.c[history.session_id_field_name]
+    Index(
+        f"ix_{table.name}_{session_column.name}_id",
+        session_column,
+        table.c.id,
+        # MySQL can only index TEXT columns with an explicit prefix length
+        mysql_length={session_column.name: 64}
+    ).create(bind=history.engine, checkfirst=True)
+    SESSION_INDEX_READY = True
+
+@functools.lru_cache(maxsize=256)
 def get_session_history(session_id: str):
     """
     Retrieves or initializes the SQL-backed chat history for a specific user session.
@@ -94,6 +219,9 @@ def get_session_history(session_id: str):
     It ensures that the bot's memory remains stateful by fetching the persistent 
     conversational context (from MySQL on Railway or local SQLite) based on 
     the unique Telegram User ID.
+
+    Instances are memoized per session ID (LRU), so repeat messages from the same user
+    reuse the same history object and the shared connection pool instead of rebuilding them.
     
     Args:
         session_id (str): The unique identifier for the user (Telegram User ID).
@@ -104,11 +232,759 @@ def get_session_history(session_id: str):
     # 1. Bind the specific user's session ID to the active database connection.
     # IMPORTANT: We initialize our custom 'Windowed' class here instead of the default 
     # LangChain class to activate the Token-Saving Sliding Window feature!
-    return WindowedSQLChatMessageHistory(
+    history = WindowedSQLChatMessageHistory(
         session_id=session_id,
-        connection=DATABASE_URL
+        connection=DB_ENGINE
     )
 
+    # 2. Make sure the sliding-window query is backed by an index (one-time check per process)
+    ensure_session_index(history)
+    return history
+
+@functools.lru_cache(maxsize=256)
+def get_session_lock(session_id: str) -> asyncio.Lock:
+    """
+    Returns the asyncio lock guarding a specific user's conversational memory.
+
+    With concurrent update processing enabled, two messages from the same user could otherwise
+    read the same history snapshot and write their turns out of order. Holding this lock for the
+    whole agent turn serializes each user's conversation while different users still run in parallel.
+
+    Args:
+        session_id (str): The unique identifier for the user (Telegram User ID).
+
+    Returns:
+        asyncio.Lock: The lock shared by every turn of this session.
+    """
+    return asyncio.Lock()
+
+# ==========================================
+# AI AGENT ENGINE (BUILT ONCE AT STARTUP)
+# ==========================================
+# The toolkit, prompt, LLM, and executor are stateless across messages, so they are constructed a single time
+# here instead of inside 'handle_message'. Every user turn then reuses the exact same object graph, keeping
+# credential loading and tool schema reflection off the latency-critical path.
+
+# 1. Initialize the Google Calendar Toolkit
+TOOLKIT = CalendarToolkit()
+calendar_tools = TOOLKIT.get_tools()
+
+# Explicit allowlist of the native LangChain tools we trust (the CRUD actions).
+# The native search/get tools are intentionally excluded (they are buggy/broken for our use case).
+ALLOWED_NATIVE_TOOLS = {
+    "create_calendar_event",  # CalendarCreateEvent
+    "update_calendar_event",  # CalendarUpdateEvent
+    "move_calendar_event",    # CalendarMoveEvent
+    "delete_calendar_event",  # CalendarDeleteEvent
+}
+used_tools = [t for t in calendar_tools if t.name in ALLOWED_NATIVE_TOOLS]
+
+# The native tools all share the toolkit's single API resource (one non-thread-safe httplib2 connection),
+# while the agent runs the tool calls of one step concurrently, each in a worker thread.
+# Their calls are therefore serialized behind one lock (the custom tools use per-thread clients instead).
+NATIVE_TOOL_LOCK = threading.Lock()
+
+def serialize_native_tool(native_tool):
+    """
+    Makes a native Calendar tool hold NATIVE_TOOL_LOCK for the whole duration of its API call.
+
+    Args:
+        native_tool (langchain_core.tools.BaseTool): One of the toolkit's tools (patched in place).
+    """
+    original_run = native_tool._run
+
+    @functools.wraps(original_run)
+    def locked_run(*args, **kwargs):
+        with NATIVE_TOOL_LOCK:
+            return original_run(*args, **kwargs)
+
+    # Tools are pydantic models, so the instance attribute is set directly (the async path
+    # delegates to '_run' in an executor, so both sync and async calls are covered)
+    object.__setattr__(native_tool, "_run", locked_run)
+
+for native_tool in used_tools:
+    serialize_native_tool(native_tool)
+
+# Inject our custom, highly-optimized tools (The Fetcher & The Sniper)
+TOOLS = used_tools + [get_id_of_schedules, get_all_schedules]
+
+class ScheduleCacheInvalidator(BaseCallbackHandler):
+    """
+    Clears the custom tools' response cache as soon as a native write tool finishes, so a read issued
+    later in the same turn (or the next message) never shows an event that was just changed or deleted.
+    Reads running concurrently with the write (same agent step) do not store their possibly outdated
+    result either (see the cache generation counter in 'function.py').
+    """
+    # Run synchronously inside the agent loop, before the next tool call is dispatched
+    run_inline = True
+
+    def on_tool_end(self, output, **kwargs):
+        if kwargs.get("name") in ALLOWED_NATIVE_TOOLS:
+            clear_schedule_cache()
+
+SCHEDULE_CACHE_INVALIDATOR = ScheduleCacheInvalidator()
+
+# 2. Construct the Custom Hybrid Tool-Calling Prompt
+# This serves as the core "Brain" of the agent, defining strict Standard Operating Procedures (SOP).
+# NOTE: The current time is injected per message through the '{current_datetime}' input variable,
+# which keeps this template static and reusable across every conversation.
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an elite, highly capable Personal Assistant managing the user's Google Calendar.
+    CURRENT SYSTEM TIME: {current_datetime}
+
+    CRITICAL RULES:
+    1. CALENDAR ID: Whenever a tool requires 'calendar_id', ALWAYS use exactly the string 'primary'.
+    2. TIME CONTEXT: Base all date and time calculations strictly on the CURRENT SYSTEM TIME.
+    3. LANGUAGE: Always respond naturally in the EXACT SAME language the user typed.
+    4. CONVERSATIONAL MEMORY: You have access to the user's previous messages in 'chat_history'. ALWAYS check this history first to find missing details (like event title, date, or time). DO NOT ask the user for information they have already provided in previous messages.
+    5. PARAMETER SAFETY:
+        - If required parameters are STILL missing after checking chat_history, ask the user for clarification before calling any tool.
+        - Never invent dates or times.
+        - Do not assume default values unless explicitly provided by the user.
+    6. BANNED TOOLS: NEVER use 'CalendarSearchEvents', 'search_events', or 'get_events'. They are broken.
+    7. PARALLEL ACTIONS: When a request contains several INDEPENDENT actions (e.g., "cancel my 2 PM meeting and book a 3 PM sync"), issue all tool calls that do not depend on each other's results TOGETHER in a single step, instead of one per step. Only wait for a result when a later call needs it (e.g., an 'EVENT_ID' required for deletion).
+
+    STANDARD OPERATING PROCEDURES (SOP) FOR CALENDAR ACTIONS:
+
+    A. CREATING AN EVENT:
+    - Use the 'CalendarCreateEvent' tool directly with the details provided.
+
+    B. DELETING AN EVENT:
+    - Step 1: You MUST FIRST use the 'get_id_of_schedules' tool (search by keyword) or 'get_all_schedules' tool (search by date. ALWAYS provide BOTH 'start_date' and 'end_date' in YYYY-MM-DD) to find the event.
+    - Step 2: Extract the 'EVENT_ID' from the tool's response.
+    - Step 3: Use the 'CalendarDeleteEvent' tool using that 'EVENT_ID'.
+
+    C. EDITING/UPDATING AN EVENT:
+    - Step 1: Use 'get_id_of_schedules' or 'get_all_schedules' (ALWAYS provide BOTH 'start_date' and 'end_date' in YYYY-MM-DD) to get the 'EVENT_ID' and the FULL original details.
+    - Step 2 (The Priority): Try to use 'CalendarUpdateEvent' using the 'EVENT_ID'. You MUST pass the updated fields AND keep the unchanged fields from Step 1.
+    - Step 3 (The Fallback): IF Step 2 fails (due to error or missing data), use the "Swap Method": 
+        a. Create a NEW event with 'CalendarCreateEvent'.
+        b. Delete the OLD event with 'CalendarDeleteEvent' using the 'EVENT_ID'.
+
+    D. READING/DISPLAYING SCHEDULES (e.g., "What is my schedule today?"):
+    - Use the 'get_all_schedules' tool.
+    - You MUST provide BOTH 'start_date' and 'end_date' in YYYY-MM-DD format (i.e., the date portion of the CURRENT SYSTEM TIME). If asking for a single day, use the same date for both.
+    - Summarize the results naturally for the user. IMPORTANT: If 'get_all_schedules' returns holidays or all-day events, make sure to mention them clearly to the user.
+
+    E. SEARCHING SPECIFIC EVENTS (e.g., "When is my 'Team Sync' meeting?"):
+    - Use the 'get_id_of_schedules' tool with the keyword (e.g., "Team Sync").
+    """),
+
+    MessagesPlaceholder(variable_name="chat_history"),
+    ("human", "{input}"),
+    MessagesPlaceholder(variable_name="agent_scratchpad"),
+])
+
+# 3. Initialize the LLM Engine
+LLM = ChatGoogleGenerativeAI(
+    model="gemini-2.5-flash",
+    google_api_key=GOOGLE_API_KEY,
+    temperature=0.3
+)
+
+# 4. Bind the Reasoning Engine (The Brain)
+agent_brain = create_tool_calling_agent(
+    llm=LLM,
+    tools=TOOLS,
+    prompt=PROMPT
+)
+
+# 5. Initialize the Base Runtime Executor (The Body)
+# 'max_iterations' caps the reasoning loop: the longest SOP path (Search -> Update -> Swap via Create + Delete)
+# needs 4 tool hops plus the final answer, so anything beyond 6 steps is a runaway loop burning quota and latency.
+AGENT_EXECUTOR = AgentExecutor(
+    agent=agent_brain,
+    tools=TOOLS,
+    handle_parsing_errors=True,
+    max_iterations=6
+)
+
+# 6. Inject the SQL-Backed Memory Wrapper
+# This dynamically loads the user's past chat history from the database 
+# and seamlessly injects it into the prompt's 'chat_history' placeholder.
+AGENT_WITH_MEMORY = RunnableWithMessageHistory(
+    AGENT_EXECUTOR, 
+    get_session_history=get_session_history,
+    input_messages_key="input",
+    history_messages_key="chat_history"
+)
+
+@functools.lru_cache(maxsize=2)
+def format_wib_datetime(epoch_second: int) -> str:
+    """
+    Formats a Unix timestamp (whole seconds) as the WIB system time string injected into the prompt.
+
+    Cached per second, so a burst of messages arriving within the same second shares one 'strftime' call.
+
+    Args:
+        epoch_second (int): The current Unix time truncated to whole seconds.
+
+    Returns:
+        str: The timestamp formatted as 'YYYY-MM-DD HH:MM:SS WIB'.
+    """
+    return datetime.fromtimestamp(epoch_second, WIB_TIMEZONE).strftime("%Y-%m-%d %H:%M:%S WIB")
+
+# ==========================================
+# CHIT-CHAT FAST PATH (NO-OP ACKNOWLEDGEMENTS)
+# ==========================================
+# Short acknowledgements ("thanks", "👍") need no calendar context or tool use,
+# so they are answered instantly with zero LLM quota.
+# NOTE: Confirmation words ("ok", "oke") are deliberately NOT matched: they usually answer a clarifying
+# question of the agent ("Shall I set it for 1 hour?") and must reach it so the confirmed action is executed.
+CHITCHAT_MAX_LENGTH = 8
+CHITCHAT_PATTERN = re.compile(r"^\s*(?:thanks?|thx|ty|cool|nice|👍|🙏|🚀|\.)\s*$", re.IGNORECASE)
+CHITCHAT_REPLY = "👍"
+
+async def answer_chitchat_directly(session_id: str, user_text: str):
+    """
+    Acknowledges trivial messages without invoking the LLM agent.
+
+    The shortcut is skipped whenever the assistant's last stored message asked a question, because the
+    acknowledgement is then an answer the agent has to act on. Handled exchanges are written to the
+    user's memory, so the conversation history stays complete.
+
+    Args:
+        session_id (str): The unique identifier for the user (Telegram User ID).
+        user_text (str): The raw message typed by the user.
+
+    Returns:
+        str | None: The acknowledgement reply, or None if the message must go through the full LLM agent.
+    """
+    if len(user_text) > CHITCHAT_MAX_LENGTH or not CHITCHAT_PATTERN.match(user_text):
+        return None
+
+    # 1. Hand the message to the agent if it is replying to a pending question
+    history = get_session_history(session_id)
+    messages = await history.aget_messages()
+    if messages and isinstance(messages[-1], AIMessage) and "?" in extract_text_content(messages[-1].content):
+        return None
+
+    # 2. Persist the exchange into the conversational memory, exactly like a regular agent turn
+    await history.aadd_messages([
+        HumanMessage(content=user_text),
+        AIMessage(content=CHITCHAT_REPLY)
+    ])
+    return CHITCHAT_REPLY
+
+# ==========================================
+# SOLIDIFIED FAST PATH (READ-ONLY SCHEDULE QUERIES)
+# ==========================================
+# Highly templated requests such as "What's my schedule today?" always resolve to the exact same single
+# tool call, so they are executed directly with 'get_all_schedules' and skip the LLM round-trip entirely.
+# SAFETY: Only READ intents are solidified. Create/Update/Delete requests always go through the full agent,
+# because replaying write actions with regex-extracted parameters could modify the wrong event.
+SCHEDULE_QUERY_PATTERN = re.compile(
+    r"^\s*(?:"
+    r"(?:what(?:'s|\s+is)\s+)?(?:on\s+)?my\s+(?:schedule|agenda)(?:\s+for)?"  # English: "what's my schedule for today?"
+    r"|(?:apa\s+)?jadwal(?:ku|\s+saya)?"                                        # Indonesian: "jadwal hari ini?"
+    r")\s+(?P<day>today|tomorrow|hari\s+ini|besok)\s*[?!.]*\s*$",
+    re.IGNORECASE
+)
+
+# Day offsets (relative to today in WIB) for every keyword captured by the 'day' group
+SCHEDULE_DAY_OFFSETS = {"today": 0, "hari ini": 0, "tomorrow": 1, "besok": 1}
+
+# Localized reply templates for every keyword captured by the 'day' group. The keyword also tells the
+# user's language (English vs Indonesian), so the fast path answers in the same language as the agent would.
+SCHEDULE_REPLY_TEMPLATES = {
+    "today": {
+        "header": "📅 **Your schedule for today ({date}):**",
+        "empty": "📅 You have no events scheduled for today ({date}).",
+        "all_day": "All-day",
+        "stale": "_(Google Calendar is unreachable right now, this is the last known schedule.)_",
+    },
+    "tomorrow": {
+        "header": "📅 **Your schedule for tomorrow ({date}):**",
+        "empty": "📅 You have no events scheduled for tomorrow ({date}).",
+        "all_day": "All-day",
+        "stale": "_(Google Calendar is unreachable right now, this is the last known schedule.)_",
+    },
+    "hari ini": {
+        "header": "📅 **Jadwal kamu hari ini ({date}):**",
+        "empty": "📅 Tidak ada jadwal untuk hari ini ({date}).",
+        "all_day": "Seharian",
+        "stale": "_(Google Calendar sedang tidak dapat diakses, ini jadwal terakhir yang tersimpan.)_",
+    },
+    "besok": {
+        "header": "📅 **Jadwal kamu besok ({date}):**",
+        "empty": "📅 Tidak ada jadwal untuk besok ({date}).",
+        "all_day": "Seharian",
+        "stale": "_(Google Calendar sedang tidak dapat diakses, ini jadwal terakhir yang tersimpan.)_",
+    },
+}
+
+def render_schedule_reply(day_keyword: str, target_date: str, schedule: str) -> str:
+    """
+    Turns the schedule fetcher's raw output into a short reply in the user's language.
+
+    Args:
+        day_keyword (str): The normalized keyword captured by the 'day' group (e.g., 'besok').
+        target_date (str): The resolved 'YYYY-MM-DD' date.
+        schedule (str): The raw tool output ('- [YYYY-MM-DD] Title (HH:MM - HH:MM)' lines under a header).
+
+    Returns:
+        str: The localized Markdown reply.
+    """
+    template = SCHEDULE_REPLY_TEMPLATES[day_keyword]
+
+    # 1. Keep only the event lines, dropping the redundant '[YYYY-MM-DD] ' prefix (a single day is queried)
+    items = []
+    for line in schedule.splitlines():
+        if line.startswith("- ["):
+            entry = line.split("] ", 1)[1]
+            if entry.endswith("(All-day)"):
+                entry = entry[:-len("(All-day)")] + f"({template['all_day']})"
+            items.append(f"- {entry}")
+
+    # 2. Assemble the reply (flagging answers served from the stale cache)
+    lines = [template["header"].format(date=target_date), *items] if items else [template["empty"].format(date=target_date)]
+    if schedule.startswith("(stale)"):
+        lines.append(template["stale"])
+    return "\n".join(lines)
+
+async def answer_schedule_query_directly(session_id: str, user_text: str):
+    """
+    Answers templated "what is my schedule today/tomorrow" questions without invoking the LLM agent.
+
+    The date is resolved deterministically, the schedule fetcher tool is awaited directly,
+    and the exchange is written to the user's memory so follow-up questions keep their context.
+
+    Args:
+        session_id (str): The unique identifier for the user (Telegram User ID).
+        user_text (str): The raw message typed by the user.
+
+    Returns:
+        str | None: The localized schedule reply, or None if the message does not match a solidified template
+        or the direct call failed (the caller then falls back to the full LLM agent).
+    """
+    match = SCHEDULE_QUERY_PATTERN.match(user_text)
+    if not match:
+        return None
+
+    # 1. Resolve the requested day into a concrete 'YYYY-MM-DD' date in WIB
+    day_keyword = " ".join(match.group("day").lower().split())
+    target_date = (datetime.now(WIB_TIMEZONE) + timedelta(days=SCHEDULE_DAY_OFFSETS[day_keyword])).strftime("%Y-%m-%d")
+
+    # 2. Execute the recorded tool call directly (Safety Fallback: any failure hands control back to the LLM)
+    try:
+        schedule = await get_all_schedules.ainvoke({"start_date": target_date, "end_date": target_date})
+    except Exception as e:
+        logging.warning(f"Schedule fast path failed, falling back to the AI agent: {e}")
+        return None
+
+    if schedule.startswith("Error"):
+        return None
+
+    # 3. Render a short reply in the user's language (never the tool's raw English output)
+    reply = render_schedule_reply(day_keyword, target_date, schedule)
+
+    # 4. Persist the exchange into the conversational memory, exactly like a regular agent turn
+    await get_session_history(session_id).aadd_messages([
+        HumanMessage(content=user_text),
+        AIMessage(content=reply)
+    ])
+    return reply
+
+# ==========================================
+# TELEGRAM MARKDOWNV2 FORMATTING
+# ==========================================
+# Every outbound message uses MarkdownV2, which fails fast on unescaped special characters instead of
+# guessing like legacy Markdown. Standard Markdown (as written by the LLM and in our static texts) is
+# converted with 'telegramify_markdown', while raw user-supplied strings go through this escape table.
+MDV2_ESCAPE = str.maketrans({char: "\\" + char for char in "\\_*[]()~`>#+-=|{}.!"})
+
+# Reverses MarkdownV2 escaping, used when a message has to fall back to plain text
+MDV2_UNESCAPE_PATTERN = re.compile(r"\\(.)", re.DOTALL)
+
+def to_markdown_v2(text: str) -> str:
+    """
+    Converts standard Markdown (e.g., '**bold**', '*italic*') into Telegram-safe MarkdownV2.
+
+    Args:
+        text (str): The Markdown text to convert.
+
+    Returns:
+        str: The MarkdownV2 text with all special characters properly escaped.
+    """
+    return telegramify_markdown.markdownify(text)
+
+# ==========================================
+# TELEGRAM MESSAGE CHUNKING
+# ==========================================
+# Telegram strict limit is 4096. We use 4000 as a safety buffer.
+MAX_LENGTH = 4000
+
+# Fallback splitter for a single paragraph that is longer than MAX_LENGTH on its own:
+# it prefers to cut right after a line break, otherwise it hard-cuts at MAX_LENGTH - 2 characters
+# (leaving room for the '\n\n' separator appended when the chunk is flushed).
+HARD_SPLIT_PATTERN = re.compile(rf".{{1,{MAX_LENGTH - 3}}}(?:\n|$)|.{{1,{MAX_LENGTH - 2}}}", re.DOTALL)
+
+def split_message_into_chunks(text: str) -> list:
+    """
+    Splits a long AI response into Telegram-sized chunks without breaking Markdown paragraphs.
+
+    Paragraphs (separated by double newlines) are packed greedily into a list buffer that is
+    joined once per chunk, so the total work stays linear in the length of the response.
+
+    Args:
+        text (str): The full response text generated by the AI agent.
+
+    Returns:
+        list: The ordered message chunks, each safely below Telegram's length limit.
+    """
+    # Short responses are sent as-is
+    if len(text) <= MAX_LENGTH:
+        return [text]
+
+    chunks = []
+    buffer, buffer_length = [], 0
+
+    # Split by double newlines to preserve Markdown paragraph structure
+    for part in text.split('\n\n'):
+        # Oversized paragraphs are hard-split first, since they can never fit into a single message
+        pieces = HARD_SPLIT_PATTERN.findall(part) if len(part) + 2 > MAX_LENGTH else (part,)
+
+        for piece in pieces:
+            piece_length = len(piece) + 2  # Account for the '\n\n' separator
+
+            # If the chunk is full, flush it to the output list and start a new one
+            if buffer and buffer_length + piece_length >= MAX_LENGTH:
+                chunks.append("\n\n".join(buffer) + "\n\n")
+                buffer, buffer_length = [], 0
+
+            buffer.append(piece)
+            buffer_length += piece_length
+
+    # Append any remaining text in the buffer
+    if buffer:
+        chunks.append("\n\n".join(buffer))
+
+    return chunks
+
+# ==========================================
+# AGENT OUTPUT PARSING & STREAMING
+# ==========================================
+# Generic reply used whenever the agent returns nothing usable
+FALLBACK_ANSWER = "Sorry, I am unable to process that scheduling request right now."
+
+def extract_text_content(content) -> str:
+    """
+    Safely extracts plain text from an LLM message content payload.
+
+    Gemini may return either a plain string or a complex list structure of content parts
+    (e.g., dictionaries with a 'text' key), so both shapes are normalized into a single string.
+
+    Args:
+        content (str | list): The raw 'content' of an AI message or streamed message chunk.
+
+    Returns:
+        str: The concatenated text content (an empty string if there is none).
+    """
+    if isinstance(content, str):
+        return content
+
+    # Sanitize the output if the LLM returns a complex list structure
+    cleaned_text = ""
+    for part in content:
+        if isinstance(part, dict) and "text" in part:
+            cleaned_text += part["text"]
+        elif isinstance(part, str):
+            cleaned_text += part
+    return cleaned_text
+
+# ==========================================
+# OUTBOUND MESSAGE DISPATCH
+# ==========================================
+# Caps the number of in-flight Telegram sends across all handlers, keeping the bot safely
+# below Telegram's flood limit (~30 messages/second) when many replies go out at once.
+SEND_SEMAPHORE = asyncio.Semaphore(20)
+
+async def send_throttled(context: ContextTypes.DEFAULT_TYPE, **kwargs):
+    """
+    Sends a Telegram message while holding a slot of the global send semaphore.
+
+    Independent messages can be dispatched concurrently with 'asyncio.gather' through this
+    helper without ever exceeding the configured number of simultaneous requests.
+
+    Args:
+        context (telegram.ext.ContextTypes.DEFAULT_TYPE): The context object for API interactions.
+        **kwargs: Keyword arguments forwarded verbatim to 'context.bot.send_message'.
+
+    Returns:
+        telegram.Message: The message that was sent.
+    """
+    async with SEND_SEMAPHORE:
+        return await context.bot.send_message(**kwargs)
+
+# Minimum delay between two progressive edits of a streamed reply.
+# Telegram tolerates roughly one 'editMessageText' per second per message before flood-limiting.
+STREAM_EDIT_INTERVAL = 1.0
+
+# Temporary text shown in the reply bubble until the first tokens arrive
+STREAM_PLACEHOLDER = "⏳ ..."
+
+async def edit_message_safely(message, text: str) -> None:
+    """
+    Replaces the text of an already-sent bot message, preferring MarkdownV2 formatting.
+
+    If Telegram still refuses to parse a half-streamed chunk (e.g., one cut in the middle of an
+    entity), the text is shown unformatted until the next edit.
+
+    Args:
+        message (telegram.Message): The bot message to update.
+        text (str): The new message text (already in MarkdownV2).
+    """
+    async with SEND_SEMAPHORE:
+        try:
+            await message.edit_text(text=text, parse_mode=constants.ParseMode.MARKDOWN_V2)
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                return
+            await message.edit_text(text=MDV2_UNESCAPE_PATTERN.sub(r"\1", text))
+
+async def render_streamed_reply(context: ContextTypes.DEFAULT_TYPE, chat_id: int, rendered: list, text: str) -> None:
+    """
+    Synchronizes the Telegram bubbles of a streamed reply with the text accumulated so far.
+
+    The text is split with the regular chunker. Bubbles whose chunk changed are edited in place, and once
+    the answer outgrows a bubble the next chunk opens a new message (earlier bubbles are effectively frozen).
+    If the text shrank (intermediate text discarded at a tool call), the leftover bubbles are deleted.
+
+    Args:
+        context (telegram.ext.ContextTypes.DEFAULT_TYPE): The context object for API interactions.
+        chat_id (int): The chat receiving the reply.
+        rendered (list): Mutable list of [message, shown_text] pairs, one per bubble already on screen.
+        text (str): The full answer text accumulated so far.
+    """
+    # Convert to MarkdownV2 first, so each chunk is measured with its escape characters included
+    chunks = split_message_into_chunks(to_markdown_v2(text))
+    for index, chunk in enumerate(chunks):
+        if index < len(rendered):
+            message, shown_text = rendered[index]
+            if chunk != shown_text:
+                await edit_message_safely(message, chunk)
+                rendered[index][1] = chunk
+        else:
+            try:
+                message = await send_throttled(context, chat_id=chat_id, text=chunk, parse_mode=constants.ParseMode.MARKDOWN_V2)
+            except BadRequest:
+                message = await send_throttled(context, chat_id=chat_id, text=MDV2_UNESCAPE_PATTERN.sub(r"\1", chunk))
+            rendered.append([message, chunk])
+
+    # Remove the bubbles that no longer hold any part of the text
+    for message, _ in rendered[len(chunks):]:
+        await message.delete()
+    del rendered[len(chunks):]
+
+async def stream_agent_reply(context: ContextTypes.DEFAULT_TYPE, chat_id: int, session_id: str, agent_input: dict) -> None:
+    """
+    Runs the AI agent and streams its final answer into Telegram as it is being generated.
+
+    A placeholder bubble is sent immediately and progressively edited (debounced to respect Telegram's
+    edit rate limit), so the user sees the first tokens long before the full generation completes.
+    If the agent fails, the placeholder itself is replaced by the categorized error reply.
+
+    Args:
+        context (telegram.ext.ContextTypes.DEFAULT_TYPE): The context object for API interactions.
+        chat_id (int): The chat receiving the reply.
+        session_id (str): The unique identifier for the user (Telegram User ID).
+        agent_input (dict): The prompt variables ('input' and 'current_datetime') for the agent.
+    """
+    # 1. Send the placeholder bubble that will be filled progressively
+    placeholder = await send_throttled(context, chat_id=chat_id, text=STREAM_PLACEHOLDER)
+    rendered = [[placeholder, STREAM_PLACEHOLDER]]
+
+    answer_parts = []
+    last_render = time.monotonic()
+
+    # 2. Consume the agent's event stream and accumulate the tokens of the final answer
+    try:
+        async for event in AGENT_WITH_MEMORY.astream_events(
+            agent_input,
+            config={"configurable": {"session_id": session_id}, "callbacks": [SCHEDULE_CACHE_INVALIDATOR]},
+            version="v2"
+        ):
+            if event["event"] == "on_tool_start":
+                # Any text streamed before a tool call was intermediate reasoning, not the final answer
+                answer_parts.clear()
+
+            elif event["event"] == "on_chat_model_stream":
+                token = extract_text_content(event["data"]["chunk"].content)
+                if not token:
+                    continue
+                answer_parts.append(token)
+
+                # Debounce the edits so the bubble is refreshed at most once per STREAM_EDIT_INTERVAL
+                if time.monotonic() - last_render >= STREAM_EDIT_INTERVAL:
+                    await render_streamed_reply(context, chat_id, rendered, "".join(answer_parts))
+                    last_render = time.monotonic()
+
+    except Exception as e:
+        # The agent failed mid-stream: turn the placeholder (or the half-streamed answer) into the
+        # categorized error reply, instead of leaving it on screen next to a separate error message
+        logging.error(f"Failed to generate AI response for User {session_id}: {e}")
+        await edit_message_safely(rendered[0][0], ERROR_REPLIES[categorize_error(e)])
+        for message, _ in rendered[1:]:
+            await message.delete()
+        return
+
+    # 3. Final render with the complete answer (or a generic apology if nothing usable was produced)
+    final_answer = "".join(answer_parts).strip() or FALLBACK_ANSWER
+    await render_streamed_reply(context, chat_id, rendered, final_answer)
+    if len(rendered) > 1:
+        logging.info(f"⚠️ Message is too long. Split into {len(rendered)} readable chunks.")
+
+# ==========================================
+# AI ERROR CATEGORIZATION
+# ==========================================
+# One precompiled, case-insensitive alternation with a named group per failure scenario.
+# A single regex scan replaces the chained substring checks on a lowercased copy of the error
+# (used only when the exception type itself is not recognized, see 'categorize_error').
+ERROR_CATEGORY_PATTERN = re.compile(
+    r"(?P<quota>quota|429|exhausted)"                         # Scenario A: AI Rate Limits or Exhausted Quota (Gemini API)
+    r"|(?P<api_key>api_key|key invalid|403)"                  # Scenario B: Authentication or Billing Issues (Missing/Invalid API Key)
+    r"|(?P<calendar>unauthorized|invalid_grant|calendar_id)", # Scenario C: Google Calendar Access Issues (Token expired or Calendar not found)
+    re.IGNORECASE
+)
+
+# Well-known exception types mapped straight to their scenario. Checking the type is O(1)
+# and more accurate than scanning the (potentially huge) error text, which remains the fallback.
+# (langchain-google-genai raises its own errors, e.g. 'GoogleRateLimitError', which subclass these
+# provider-agnostic LangChain model errors rather than 'google.api_core.exceptions'.)
+ERROR_TYPE_CATEGORIES = (
+    # Scenario A: Gemini quota exhausted (HTTP 429)
+    (ModelRateLimitError, "quota"),
+    # Scenario B: Invalid or unauthorized API key (HTTP 401/403)
+    ((ModelPermissionDeniedError, ModelAuthenticationError), "api_key"),
+    # Scenario C: Expired or revoked Google Calendar OAuth token ('invalid_grant')
+    (RefreshError, "calendar"),
+)
+
+def categorize_error(error: Exception):
+    """
+    Maps an exception raised during an AI turn to one of the user-facing error scenarios.
+
+    Args:
+        error (Exception): The exception caught while generating the AI response.
+
+    Returns:
+        str | None: The scenario key ('quota', 'api_key', 'calendar'), or None for unknown failures.
+    """
+    # 1. Fast path: dispatch on the exception type
+    for error_types, category in ERROR_TYPE_CATEGORIES:
+        if isinstance(error, error_types):
+            return category
+
+    # 2. Fallback: a single case-insensitive regex pass over the error message
+    match = ERROR_CATEGORY_PATTERN.search(str(error))
+    return match.lastgroup if match else None
+
+# User-facing replies keyed by the matched group name ('None' is the fallback for unknown failures)
+ERROR_REPLIES = {
+    "quota": "⚠️ **API Limit Reached:** My AI engine is receiving too many requests right now or has reached its daily capacity. Please try again later or tomorrow!",
+    "api_key": "🛑 **Configuration Error:** My API key seems to be invalid or expired. Please check the system environment settings.",
+    "calendar": "📅 **Calendar Sync Error:** I am having trouble accessing your Google Calendar. The authorization token might be expired or the calendar ID is incorrect.",
+    # Scenario D: The Fallback (Catch-all for network drops, timeouts, or unknown bugs)
+    None: "⚠️ **System Error:** My AI engine is currently unreachable or encountering an unexpected issue. Please try again in a moment!",
+}
+# Pre-convert every reply to MarkdownV2 once at startup
+ERROR_REPLIES = {category: to_markdown_v2(reply) for category, reply in ERROR_REPLIES.items()}
+
+# ==========================================
+# STATIC BOT MESSAGES
+# ==========================================
+# These payloads never change, so they are assembled (and pre-escaped for MarkdownV2) exactly once
+# at startup instead of being rebuilt every time a command is invoked.
+
+# The warning shown to unauthorized users
+ACCESS_DENIED_TEXT = to_markdown_v2(
+    "🚨 **Access Denied!** Unauthorized user detected. I am exclusively configured to assist my designated developer."
+)
+
+# The welcoming interface text for a Context-Aware Bot
+WELCOME_TEXT = to_markdown_v2(
+    "🤖 **Hello! I am NovaCal AI.**\n"
+    "I am your highly capable personal calendar assistant. To ensure smooth scheduling, please read my operational guidelines below:\n\n"
+
+    "🧠 **1. Conversational Memory (Stateful)**\n"
+    "I am equipped with short-term memory! We can converse naturally step-by-step. "
+    "*(e.g., You can say 'Schedule a meeting tomorrow', and if I ask 'What time?', you can just reply 'at 4 PM'.)*\n\n"
+
+    "⏱️ **2. Provide Details & Follow-ups**\n"
+    "While I can ask follow-up questions if details are missing, providing complete info upfront is always faster. If you don't specify an end time, "
+    "I might set a **1-hour default**. *(Don't worry, we can always update it!)*\n\n"
+
+    "📋 **3. Operation Guide (CRUD)**\n"
+    "• ➕ **CREATE:** Tell me the *Event Title, When (Date or Day), Start Time, and End Time*.\n"
+    "  *(e.g., 'Book a Team Sync tomorrow from 2 PM to 3:30 PM')*\n"
+    "• 📖 **READ:** Tell me the specific *Date or Timeframe* you want to check.\n"
+    "  *(e.g., 'What is my schedule for next Monday?')*\n"
+    "• ✏️ **UPDATE:** Tell me the *Exact Event Name* and the *New Details*.\n"
+    "  *(e.g., 'Change my Dentist appointment tomorrow to 10 AM')*\n"
+    "• ❌ **DELETE:** Tell me the *Exact Event Name* you want to remove.\n"
+    "  *(e.g., 'Cancel my Team Sync meeting')*\n\n"
+
+    "Send me a command whenever you're ready! 🚀"
+)
+
+# The technical specifications and system architecture payload
+INFO_TEXT = to_markdown_v2(
+    "🤖 **ABOUT NOVACAL AI**\n"
+    "━━━━━━━━━━━━━━━━━━━━━━\n"
+    "NovaCal AI is a streamlined Virtual Assistant built for seamless Google Calendar management.\n\n"
+
+    "🛠️ **TECHNICAL SPECIFICATIONS:**\n"
+    "• **AI Model:** Google Gemini 2.5 Flash\n"
+    "• **Agent Framework:** LangChain (Tool-Calling Agent)\n"
+    "• **Integrations:** Google Calendar API v3 (Custom Search & CRUD Tools)\n"
+    "• **Architecture:** Stateful (SQL-Backed Conversational Memory)\n"
+    "• **Security:** Private Access Control & Activity Logging\n"
+    "• **Developers:** Silvio Christian, Joe\n\n"
+
+    "⚡ **THE STATEFUL ADVANTAGE:**\n"
+    "Powered by a robust SQL database, NovaCal AI securely retains session context for natural, multi-turn conversations. This allows for dynamic follow-ups and complex scheduling adjustments without the need to repeat prior instructions.\n\n"
+
+    "Type /howtouse to read the operational guide!"
+)
+
+# The comprehensive operational guide and cheat sheet payload
+HOWTOUSE_TEXT = to_markdown_v2(
+    "📖 **NOVACAL AI - USER GUIDE**\n"
+    "━━━━━━━━━━━━━━━━━━━━━━\n"
+    "Welcome to your personal calendar command center. Please read the core rules below to ensure flawless execution.\n\n"
+
+    "🧠 **1. CONVERSATIONAL MEMORY**\n"
+    "I remember our ongoing conversation! You can give me instructions piece by piece or all at once.\n"
+    "✅ *Multi-turn Example:*\n"
+    "You: 'Schedule a meeting for tomorrow.'\n"
+    "Me: 'Sure, what time and what is the title?'\n"
+    "You: 'Call it Team Sync, from 2 PM to 3 PM.'\n\n"
+
+    "⏱️ **2. PARAMETER SAFETY & FOLLOW-UPS**\n"
+    "Always try to define the duration! If you don't specify an end time, I will either **ask you a follow-up question** to confirm, or automatically assume a **1-hour duration** by default. *(Don't worry, we can always update it!)*\n\n"
+
+    "⚙️ **3. COMMAND CHEAT SHEET (CRUD)**\n"
+    "To perform actions, just talk to me naturally using these formats:\n\n"
+
+    "➕ **CREATE (Add an event)**\n"
+    "• *Required:* Title, When (Date/Day), Start Time, End Time.\n"
+    "• *Prompt:* 'Book a Team Sync tomorrow from 2:00 PM to 3:30 PM.'\n\n"
+
+    "📖 **READ (Check your schedule)**\n"
+    "• *Required:* Date or Timeframe.\n"
+    "• *Prompt:* 'What is my schedule for next Monday?' or 'Do I have any meetings today?'\n\n"
+
+    "✏️ **UPDATE (Edit an event)**\n"
+    "• *Required:* Exact Event Name, Date, and the New Details.\n"
+    "• *Prompt:* 'Change my Dentist appointment tomorrow to start at 10 AM instead.'\n\n"
+
+    "❌ **DELETE (Remove an event)**\n"
+    "• *Required:* Exact Event Name and Date.\n"
+    "• *Prompt:* 'Cancel my Team Sync meeting scheduled for tomorrow.'\n\n"
+
+    "Ready? Send me your first command! 🚀"
+)
+
 # ==========================================
 # BOT COMMAND HANDLERS
 # ==========================================
@@ -127,37 +1003,11 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     # 1. Safely extract the unique ID of the chat session to route the response
     chat_id = update.effective_chat.id
 
-    # 2. Construct the welcoming interface text for a Context-Aware Bot
-    welcome_text = (
-        "🤖 **Hello! I am NovaCal AI.**\n"
-        "I am your highly capable personal calendar assistant. To ensure smooth scheduling, please read my operational guidelines below:\n\n"
-        
-        "🧠 **1. Conversational Memory (Stateful)**\n"
-        "I am equipped with short-term memory! We can converse naturally step-by-step. "
-        "*(e.g., You can say 'Schedule a meeting tomorrow', and if I ask 'What time?', you can just reply 'at 4 PM'.)*\n\n"
-        
-        "⏱️ **2. Provide Details & Follow-ups**\n"
-        "While I can ask follow-up questions if details are missing, providing complete info upfront is always faster. If you don't specify an end time, "
-        "I might set a **1-hour default**. *(Don't worry, we can always update it!)*\n\n"
-        
-        "📋 **3. Operation Guide (CRUD)**\n"
-        "• ➕ **CREATE:** Tell me the *Event Title, When (Date or Day), Start Time, and End Time*.\n"
-        "  *(e.g., 'Book a Team Sync tomorrow from 2 PM to 3:30 PM')*\n"
-        "• 📖 **READ:** Tell me the specific *Date or Timeframe* you want to check.\n"
-        "  *(e.g., 'What is my schedule for next Monday?')*\n"
-        "• ✏️ **UPDATE:** Tell me the *Exact Event Name* and the *New Details*.\n"
-        "  *(e.g., 'Change my Dentist appointment tomorrow to 10 AM')*\n"
-        "• ❌ **DELETE:** Tell me the *Exact Event Name* you want to remove.\n"
-        "  *(e.g., 'Cancel my Team Sync meeting')*\n\n"
-        
-        "Send me a command whenever you're ready! 🚀"
-    )
-
-    # 3. Transmit the welcome message back to the user asynchronously
+    # 2. Transmit the welcome message back to the user asynchronously
     await context.bot.send_message(
         chat_id=chat_id, 
-        text=welcome_text,
-        parse_mode="Markdown"
+        text=WELCOME_TEXT,
+        parse_mode=constants.ParseMode.MARKDOWN_V2
     )
 
 async def info_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -170,32 +1020,12 @@ async def info_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     """
     # 1. Safely extract the unique ID of the chat session to route the response
     chat_id = update.effective_chat.id
-    
-    # 2. Construct the technical specifications and system architecture payload
-    info_text = (
-        "🤖 **ABOUT NOVACAL AI**\n"
-        "━━━━━━━━━━━━━━━━━━━━━━\n"
-        "NovaCal AI is a streamlined Virtual Assistant built for seamless Google Calendar management.\n\n"
-        
-        "🛠️ **TECHNICAL SPECIFICATIONS:**\n"
-        "• **AI Model:** Google Gemini 2.5 Flash\n"
-        "• **Agent Framework:** LangChain (Tool-Calling Agent)\n"
-        "• **Integrations:** Google Calendar API v3 (Custom Search & CRUD Tools)\n"
-        "• **Architecture:** Stateful (SQL-Backed Conversational Memory)\n"
-        "• **Security:** Private Access Control & Activity Logging\n"
-        "• **Developers:** Silvio Christian, Joe\n\n"
-        
-        "⚡ **THE STATEFUL ADVANTAGE:**\n"
-        "Powered by a robust SQL database, NovaCal AI securely retains session context for natural, multi-turn conversations. This allows for dynamic follow-ups and complex scheduling adjustments without the need to repeat prior instructions.\n\n"
-        
-        "Type /howtouse to read the operational guide!"
-    )
-    
-    # 3. Transmit the formatted information text back to the user asynchronously
+
+    # 2. Transmit the formatted information text back to the user asynchronously
     await context.bot.send_message(
         chat_id=chat_id, 
-        text=info_text, 
-        parse_mode="Markdown"
+        text=INFO_TEXT, 
+        parse_mode=constants.ParseMode.MARKDOWN_V2
     )
 
 async def howtouse_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -212,52 +1042,71 @@ async def howtouse_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     """
     # 1. Safely extract the unique ID of the chat session to route the response
     chat_id = update.effective_chat.id
-    
-    # 2. Construct the comprehensive operational guide and cheat sheet payload
-    howtouse_text = (
-        "📖 **NOVACAL AI - USER GUIDE**\n"
-        "━━━━━━━━━━━━━━━━━━━━━━\n"
-        "Welcome to your personal calendar command center. Please read the core rules below to ensure flawless execution.\n\n"
-        
-        "🧠 **1. CONVERSATIONAL MEMORY**\n"
-        "I remember our ongoing conversation! You can give me instructions piece by piece or all at once.\n"
-        "✅ *Multi-turn Example:*\n"
-        "You: 'Schedule a meeting for tomorrow.'\n"
-        "Me: 'Sure, what time and what is the title?'\n"
-        "You: 'Call it Team Sync, from 2 PM to 3 PM.'\n\n"
-        
-        "⏱️ **2. PARAMETER SAFETY & FOLLOW-UPS**\n"
-        "Always try to define the duration! If you don't specify an end time, I will either **ask you a follow-up question** to confirm, or automatically assume a **1-hour duration** by default. *(Don't worry, we can always update it!)*\n\n"
-        
-        "⚙️ **3. COMMAND CHEAT SHEET (CRUD)**\n"
-        "To perform actions, just talk to me naturally using these formats:\n\n"
-        
-        "➕ **CREATE (Add an event)**\n"
-        "• *Required:* Title, When (Date/Day), Start Time, End Time.\n"
-        "• *Prompt:* 'Book a Team Sync tomorrow from 2:00 PM to 3:30 PM.'\n\n"
-        
-        "📖 **READ (Check your schedule)**\n"
-        "• *Required:* Date or Timeframe.\n"
-        "• *Prompt:* 'What is my schedule for next Monday?' or 'Do I have any meetings today?'\n\n"
-        
-        "✏️ **UPDATE (Edit an event)**\n"
-        "• *Required:* Exact Event Name, Date, and the New Details.\n"
-        "• *Prompt:* 'Change my Dentist appointment tomorrow to start at 10 AM instead.'\n\n"
-        
-        "❌ **DELETE (Remove an event)**\n"
-        "• *Required:* Exact Event Name and Date.\n"
-        "• *Prompt:* 'Cancel my Team Sync meeting scheduled for tomorrow.'\n\n"
-        
-        "Ready? Send me your first command! 🚀"
-    )
-    
-    # 3. Transmit the formatted manual text back to the user asynchronously
+
+    # 2. Transmit the formatted manual text back to the user asynchronously
     await context.bot.send_message(
         chat_id=chat_id, 
-        text=howtouse_text, 
-        parse_mode="Markdown"
+        text=HOWTOUSE_TEXT, 
+        parse_mode=constants.ParseMode.MARKDOWN_V2
     )
 
+async def security_bouncer(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Intercepts text messages from anyone other than the designated developer.
+
+    This handler is registered with an inverted user filter, so PTB routes unauthorized updates
+    here instead of to the AI engine. It blocks the intruder, warns them, and silently alerts
+    the developer to protect calendar privacy.
+
+    Args:
+        update (telegram.Update): The payload containing incoming message details.
+        context (telegram.ext.ContextTypes.DEFAULT_TYPE): The context object for API interactions.
+    """
+    # 1. Extract metadata and user input from the incoming Telegram update
+    user_text = update.message.text
+    chat_id = update.effective_chat.id
+    user_id = update.effective_user.id
+    user_name = update.effective_user.first_name
+
+    # Log the intrusion attempt to the terminal so the developer knows who tried to snoop
+    logging.warning(f"🚨 INTRUSION ATTEMPT: Unauthorized access blocked from User ID: {user_id} (Name: {user_name})")
+
+    # 2. Prepare the silent security alert for the Developer's DM
+    # NOTE: The intruder controls both their name and their text, so these are escaped for MarkdownV2
+    alert_msg = (
+        f"⚠️ *SECURITY ALERT* ⚠️\n\n"
+        f"Someone tried to access your Calendar Bot\\!\n"
+        f"👤 *Name:* {user_name.translate(MDV2_ESCAPE)}\n"
+        f"🆔 *User ID:* `{user_id}`\n"
+        f"💬 *They typed:* _{user_text.translate(MDV2_ESCAPE)}_"
+    )
+
+    # 3. Warn the intruder and alert the developer concurrently (the two sends are independent).
+    # 'return_exceptions' ensures one failed delivery never cancels the other.
+    intruder_result, alert_result = await asyncio.gather(
+        send_throttled(
+            context,
+            chat_id=chat_id, 
+            text=ACCESS_DENIED_TEXT,
+            parse_mode=constants.ParseMode.MARKDOWN_V2
+        ),
+        send_throttled(
+            context,
+            chat_id=TELEGRAM_DEVELOPER_CHAT_ID,
+            text=alert_msg,
+            parse_mode=constants.ParseMode.MARKDOWN_V2
+        ),
+        return_exceptions=True
+    )
+
+    if isinstance(intruder_result, Exception):
+        # Catch errors if the user blocks the bot immediately before receiving the warning
+        logging.error(f"Failed to send Access Denied message to intruder (User ID: {user_id}): {intruder_result}")
+
+    if isinstance(alert_result, Exception):
+        # Catch errors if the developer's chat ID is invalid or the bot cannot message them
+        logging.error(f"Failed to send security alert to Developer: {alert_result}")
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Processes standard text messages sent by the user to the bot.
@@ -265,6 +1114,9 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     This handler acts as the core conversational engine. It captures the user's input, 
     forwards it to the Google Gemini LLM for processing, and seamlessly transmits 
     the generated response back to the Telegram chat.
+
+    NOTE: Only the designated developer reaches this handler. Access control is enforced
+    at registration time by a 'filters.User' filter (see 'security_bouncer' for everyone else).
     
     Args:
         update (telegram.Update): The payload containing incoming message details.
@@ -277,227 +1129,61 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     user_id = update.effective_user.id
     user_name = update.effective_user.first_name
 
-    # --- SECURITY BOUNCER ---
-    # Strictly limit access to the designated developer to protect calendar privacy
-    if str(user_id) != str(TELEGRAM_DEVELOPER_CHAT_ID):
-        # Log the intrusion attempt to the terminal so the developer knows who tried to snoop
-        logging.warning(f"🚨 INTRUSION ATTEMPT: Unauthorized access blocked from User ID: {user_id} (Name: {user_name})")
-
-        # 1. Attempt to send a warning to the intruder and kick them out
-        try:
-            await context.bot.send_message(
-                chat_id=chat_id, 
-                text="🚨 **Access Denied!** Unauthorized user detected. I am exclusively configured to assist my designated developer.",
-                parse_mode="Markdown"
-            )
-        except Exception as e:
-            # Catch errors if the user blocks the bot immediately before receiving the warning
-            logging.error(f"Failed to send Access Denied message to intruder (User ID: {user_id}): {e}")
-
-        # 2. Attempt to send a silent security alert to the Developer's DM
-        try:
-            alert_msg = (
-                f"⚠️ **SECURITY ALERT** ⚠️\n\n"
-                f"Someone tried to access your Calendar Bot!\n"
-                f"👤 **Name:** {user_name}\n"
-                f"🆔 **User ID:** `{user_id}`\n"
-                f"💬 **They typed:** _{user_text}_"
-            )
-            await context.bot.send_message(
-                chat_id=TELEGRAM_DEVELOPER_CHAT_ID,
-                text=alert_msg,
-                parse_mode="Markdown"
-            )
-        except Exception as e:
-            # Catch errors if the developer's chat ID is invalid or the bot cannot message them
-            logging.error(f"Failed to send security alert to Developer: {e}")
-            
-        # 3. Terminate the function immediately to prevent unauthorized calendar access
-        return
-
     try: 
         # 2. Trigger the 'Typing...' action indicator in the Telegram UI
         await context.bot.send_chat_action(chat_id=chat_id, action=constants.ChatAction.TYPING)
 
-        # 3. Initialize the Google Calendar Toolkit
-        toolkit = CalendarToolkit()
-        calendar_tools = toolkit.get_tools()
+        # 3. Capture the Exact Current System Time for Contextual Accuracy
+        current_datetime = format_wib_datetime(int(time.time()))
 
-        # Filter out native LangChain search tools (they are buggy/broken for our use case)
-        used_tools = [t for t in calendar_tools if "search" not in t.name.lower() and "get" not in t.name.lower()]
+        # IMPORTANT: The per-session lock keeps this user's memory reads/writes in order under concurrent updates.
+        session_id = str(user_id)
+        async with get_session_lock(session_id):
+            # 4. Fast Paths: trivial acknowledgements and templated read-only queries are answered without calling the LLM
+            final_answer = await answer_chitchat_directly(session_id, user_text)
+            if final_answer is None:
+                final_answer = await answer_schedule_query_directly(session_id, user_text)
 
-        # Inject our custom, highly-optimized tools (The Fetcher & The Sniper)
-        tools = used_tools + [get_id_of_schedules, get_all_schedules]
+            # 5. Otherwise, execute the pre-built Agent workflow using the User's unique session ID
+            # and stream the answer into Telegram as it is generated (fully async, so the event loop
+            # stays free to serve other updates while the LLM and Google Calendar round-trips are in flight).
+            if final_answer is None:
+                await stream_agent_reply(
+                    context,
+                    chat_id,
+                    session_id,
+                    {"input": user_text, "current_datetime": current_datetime}
+                )
+                return
 
-        # Capture the Exact Current System Time for Contextual Accuracy
-        wib_timezone = timezone(timedelta(hours=7))
-        current_datetime = datetime.now(wib_timezone).strftime("%Y-%m-%d %H:%M:%S WIB")
+        # 6. Convert to MarkdownV2 and handle Telegram's Message Length Limits
+        message_to_send = split_message_into_chunks(to_markdown_v2(final_answer))
+        if len(message_to_send) > 1:
+            logging.info(f"⚠️ Message is too long. Split into {len(message_to_send)} readable chunks.")
 
-        
-        # 4. Construct the Custom Hybrid Tool-Calling Prompt
-        # This serves as the core "Brain" of the agent, defining strict Standard Operating Procedures (SOP).
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", f"""You are an elite, highly capable Personal Assistant managing the user's Google Calendar.
-            CURRENT SYSTEM TIME: {current_datetime}
-            
-            CRITICAL RULES:
-            1. CALENDAR ID: Whenever a tool requires 'calendar_id', ALWAYS use exactly the string 'primary'.
-            2. TIME CONTEXT: Base all date and time calculations strictly on the CURRENT SYSTEM TIME.
-            3. LANGUAGE: Always respond naturally in the EXACT SAME language the user typed.
-            4. CONVERSATIONAL MEMORY: You have access to the user's previous messages in 'chat_history'. ALWAYS check this history first to find missing details (like event title, date, or time). DO NOT ask the user for information they have already provided in previous messages.
-            5. PARAMETER SAFETY:
-                - If required parameters are STILL missing after checking chat_history, ask the user for clarification before calling any tool.
-                - Never invent dates or times.
-                - Do not assume default values unless explicitly provided by the user.
-            6. BANNED TOOLS: NEVER use 'CalendarSearchEvents', 'search_events', or 'get_events'. They are broken.
-            
-            STANDARD OPERATING PROCEDURES (SOP) FOR CALENDAR ACTIONS:
-            
-            A. CREATING AN EVENT:
-            - Use the 'CalendarCreateEvent' tool directly with the details provided.
-            
-            B. DELETING AN EVENT:
-            - Step 1: You MUST FIRST use the 'get_id_of_schedules' tool (search by keyword) or 'get_all_schedules' tool (search by date. ALWAYS provide BOTH 'start_date' and 'end_date' in YYYY-MM-DD) to find the event.
-            - Step 2: Extract the 'EVENT_ID' from the tool's response.
-            - Step 3: Use the 'CalendarDeleteEvent' tool using that 'EVENT_ID'.
-            
-            C. EDITING/UPDATING AN EVENT:
-            - Step 1: Use 'get_id_of_schedules' or 'get_all_schedules' (ALWAYS provide BOTH 'start_date' and 'end_date' in YYYY-MM-DD) to get the 'EVENT_ID' and the FULL original details.
-            - Step 2 (The Priority): Try to use 'CalendarUpdateEvent' using the 'EVENT_ID'. You MUST pass the updated fields AND keep the unchanged fields from Step 1.
-            - Step 3 (The Fallback): IF Step 2 fails (due to error or missing data), use the "Swap Method": 
-                a. Create a NEW event with 'CalendarCreateEvent'.
-                b. Delete the OLD event with 'CalendarDeleteEvent' using the 'EVENT_ID'.
-            
-            D. READING/DISPLAYING SCHEDULES (e.g., "What is my schedule today?"):
-            - Use the 'get_all_schedules' tool.
-            - You MUST provide BOTH 'start_date' and 'end_date' in YYYY-MM-DD format (e.g., '{current_datetime[:10]}'). If asking for a single day, use the same date for both.
-            - Summarize the results naturally for the user. IMPORTANT: If 'get_all_schedules' returns holidays or all-day events, make sure to mention them clearly to the user.
-            
-            E. SEARCHING SPECIFIC EVENTS (e.g., "When is my 'Team Sync' meeting?"):
-            - Use the 'get_id_of_schedules' tool with the keyword (e.g., "Team Sync").
-            """),
-            
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
-        ])
-
-        # 5. Initialize the LLM Engine
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=GOOGLE_API_KEY,
-            temperature=0.3
-        )
-
-        # 6. Bind the Reasoning Engine (The Brain)
-        agent_brain = create_tool_calling_agent(
-            llm=llm,
-            tools=tools,
-            prompt=prompt
-        )
-
-        # 7. Initialize the Base Runtime Executor (The Body)
-        agent_executor = AgentExecutor(
-            agent=agent_brain,
-            tools=tools,
-            handle_parsing_errors=True
-        )
-
-        # 8. Inject the SQL-Backed Memory Wrapper
-        # This dynamically loads the user's past chat history from the database 
-        # and seamlessly injects it into the prompt's 'chat_history' placeholder.
-        agent_with_memory = RunnableWithMessageHistory(
-            agent_executor, 
-            get_session_history=get_session_history,
-            input_messages_key="input",
-            history_messages_key="chat_history"
-        )
-
-        # 9. Execute the Agent workflow using the User's unique session ID
-        response = agent_with_memory.invoke(
-            {"input": user_text},
-            config={"configurable": {"session_id": str(user_id)}}
-        )
-        # 10. Safely parse the LLM's output
-        if "output" in response and len(response["output"]) > 0:
-            final_answer = response.get("output", "Sorry, I am unable to process that scheduling request right now.")
-
-            # Sanitize the output if the LLM returns a complex list structure
-            if isinstance(final_answer, list):
-                cleaned_text = ""
-                for part in final_answer:
-                    if isinstance(part, dict) and "text" in part:
-                        cleaned_text += part["text"]
-                    elif isinstance(part, str):
-                        cleaned_text += part
-                final_answer = cleaned_text   
-        else:
-            final_answer = "Sorry, I am unable to process that scheduling request right now."
-        
-        # 11. Handle Telegram's Message Length Limits
-        # Telegram strict limit is 4096. We use 4000 as a safety buffer.
-        MAX_LENGTH = 4000
-        message_to_send = []
-
-        # Check if the final response exceeds the maximum length constraint
-        if len(final_answer) <= MAX_LENGTH:
-            message_to_send.append(final_answer)
-        else:
-            logging.info("⚠️ Message is too long. Splitting into readable chunks...")
-
-            # Split by double newlines to preserve Markdown paragraph structure
-            parts = final_answer.split('\n\n')
-            current_chunks = ""
-
-            for part in parts:
-                # Check if adding the next part exceeds the limit
-                if len(current_chunks) + len(part) + 2 < MAX_LENGTH:
-                    current_chunks += part + "\n\n"
-                else:
-                    # If the chunk is full, append to list and start a new one
-                    if current_chunks.strip():
-                        message_to_send.append(current_chunks)
-                    current_chunks = part + "\n\n"
-
-            # Append any remaining text in the buffer
-            if current_chunks.strip():
-                message_to_send.append(current_chunks)
-
-        # 12. Transmit the formulated chunks back to the user asynchronously
-        for i, answer in enumerate(message_to_send):
-            await context.bot.send_message(
+        # 7. Transmit the formulated chunks back to the user asynchronously
+        # NOTE: Chunks of the same answer are awaited one by one on purpose, so they always arrive in reading order.
+        for answer in message_to_send:
+            await send_throttled(
+                context,
                 chat_id=chat_id,
                 text=answer,
-                parse_mode="Markdown"
+                parse_mode=constants.ParseMode.MARKDOWN_V2
             )
     
     except Exception as e:
-        # 13. Prevent silent failures by safely catching, categorizing, and notifying the user
-        error_msg = str(e).lower()
+        # 8. Prevent silent failures by safely catching, categorizing, and notifying the user
         logging.error(f"Failed to generate AI response for User {user_id} ({user_name}): {e}")
-        
-        # Scenario A: AI Rate Limits or Exhausted Quota (Gemini API)
-        if "quota" in error_msg or "429" in error_msg or "exhausted" in error_msg:
-            reply_text = "⚠️ **API Limit Reached:** My AI engine is receiving too many requests right now or has reached its daily capacity. Please try again later or tomorrow!"
-            
-        # Scenario B: Authentication or Billing Issues (Missing/Invalid API Key)
-        elif "api_key" in error_msg or "key invalid" in error_msg or "403" in error_msg:
-            reply_text = "🛑 **Configuration Error:** My API key seems to be invalid or expired. Please check the system environment settings."
-            
-        # Scenario C: Google Calendar Access Issues (Token expired or Calendar not found)
-        elif "unauthorized" in error_msg or "invalid_grant" in error_msg or "calendar_id" in error_msg:
-            reply_text = "📅 **Calendar Sync Error:** I am having trouble accessing your Google Calendar. The authorization token might be expired or the calendar ID is incorrect."
-            
-        # Scenario D: The Fallback (Catch-all for network drops, timeouts, or unknown bugs)
-        else:
-            reply_text = "⚠️ **System Error:** My AI engine is currently unreachable or encountering an unexpected issue. Please try again in a moment!"
+
+        # Categorize the failure (exception type first, error text as fallback) and pick the matching reply
+        reply_text = ERROR_REPLIES[categorize_error(e)]
 
         # Safely transmit the categorized error message back to the user
         try:
             await context.bot.send_message(
                 chat_id=chat_id, 
                 text=reply_text, 
-                parse_mode="Markdown"
+                parse_mode=constants.ParseMode.MARKDOWN_V2
             )
         except Exception as send_error:
             # The absolute last line of defense in case Telegram itself is down
@@ -523,9 +1209,11 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     logging.error(f"Exception while handling an update: {context.error}")
 
     # 2. Construct the emergency notification payload
+    # Inside a MarkdownV2 code span only backslashes and backticks must be escaped
+    error_details = str(context.error).replace("\\", "\\\\").replace("`", "\\`")
     error_message = (
-        f"🚨 **SYSTEM ALERT: BOT ENCOUNTERED AN ERROR!** 🚨\n\n"
-        f"**Error Details:**\n`{context.error}`"
+        f"🚨 *SYSTEM ALERT: BOT ENCOUNTERED AN ERROR\\!* 🚨\n\n"
+        f"*Error Details:*\n`{error_details}`"
     )
     
     # 3. Attempt to alert the developer via Telegram DM
@@ -534,7 +1222,7 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         await context.bot.send_message(
             chat_id=TELEGRAM_DEVELOPER_CHAT_ID, 
             text=error_message, 
-            parse_mode="Markdown"
+            parse_mode=constants.ParseMode.MARKDOWN_V2
         )
     except Exception as e:
         # Gracefully handle the scenario where the error alert fails to deliver 
@@ -546,21 +1234,51 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 # MAIN APPLICATION EXECUTOR
 # ==========================================
 if __name__ == "__main__":
+    # 0. Swap in the high-performance uvloop event loop (if installed) before the Application creates its loop
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
     # 1. Initialize and build the Telegram Bot Application using the secure environment token
-    app = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
+    # The outbound HTTP client multiplexes concurrent Bot API calls over HTTP/2, with a connection pool
+    # comfortably larger than SEND_SEMAPHORE so bursts of sends/edits never wait for a free connection.
+    # (The long-polling 'getUpdates' call keeps PTB's own dedicated request object.)
+    bot_request = HTTPXRequest(
+        connection_pool_size=32,
+        http_version="2",
+        read_timeout=30,
+        write_timeout=30
+    )
+
+    # 'concurrent_updates' dispatches each update as its own task, so one slow AI turn never blocks other chats
+    app = ApplicationBuilder().token(TELEGRAM_TOKEN).request(bot_request).concurrent_updates(True).build()
 
     # 2. Register Core Command Handlers (/start, /info, /howtouse)
     app.add_handler(CommandHandler("start", start_command))
     app.add_handler(CommandHandler("info", info_command))
     app.add_handler(CommandHandler("howtouse", howtouse_command))
     
-    # 3. Register the Conversational Message Handler 
-    # This captures all regular text prompts intended for the AI while explicitly bypassing commands
-    app.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND), handle_message))
+    # 3. Register the Conversational Message Handlers
+    # These capture all regular text prompts while explicitly bypassing commands. The user filter routes
+    # the developer to the AI engine and everyone else to the Security Bouncer before any AI code runs.
+    developer_only = filters.User(user_id=TELEGRAM_DEVELOPER_CHAT_ID)
+    app.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND) & developer_only, handle_message))
+    app.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND) & (~developer_only), security_bouncer))
     
     # 4. Register the Global Error Handler (The Ambulance) to safely catch and log unexpected system crashes
     app.add_error_handler(error_handler)
 
-    # 5. Ignite the AI engine and start continuous polling for incoming Telegram updates
+    # 5. Ignite the AI engine and start receiving incoming Telegram updates
     logging.info("🚀 NovaCal AI Telegram Bot is currently online and listening...")
-    app.run_polling()
\ No newline at end of file
+    if USE_WEBHOOK:
+        # PRODUCTION: Telegram pushes every update to our endpoint the moment it arrives (no poll-cycle latency).
+        # The bot token doubles as a hard-to-guess URL path, and the secret token lets PTB reject forged requests.
+        app.run_webhook(
+            listen="0.0.0.0",
+            port=WEBHOOK_PORT,
+            url_path=TELEGRAM_TOKEN,
+            webhook_url=f"{WEBHOOK_URL}/{TELEGRAM_TOKEN}",
+            secret_token=WEBHOOK_SECRET
+        )
+    else:
+        # LOCAL DEVELOPMENT: Fall back to continuous long-polling (no public URL required)
+        app.run_polling()
\ No newline at end of file
@@ -1,140 +1,439 @@
+import re
+import time
+import random
+import inspect
+import functools
+import threading
+from datetime import datetime
+
+from cachetools import TTLCache
+
+from google.auth.exceptions import TransportError
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+import httplib2
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from langchain.tools import tool
 
+# Google Calendar API scopes granted in 'token.json'
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+
+# Day boundaries in Western Indonesia Time (UTC+7), appended to a validated 'YYYY-MM-DD' date
+# to form the RFC3339 'timeMin'/'timeMax' of a schedule query
+_WIB_DAY_START = "T00:00:00+07:00"
+_WIB_DAY_END = "T23:59:59+07:00"
+
+# ==========================================
+# GOOGLE CALENDAR CREDENTIALS & SERVICE CACHE
+# ==========================================
+# 'token.json' is parsed only ONCE per process and the resulting Credentials object is shared by every
+# thread. It is loaded lazily (not at import time) because the bot writes 'token.json' from its env vars
+# after importing this module. The lock keeps concurrent tools from refreshing the same token twice.
+_credentials = None
+_credentials_lock = threading.Lock()
+
+# Building the API client (constructing the discovery resource) is expensive, so each worker thread
+# keeps its own cached client. It is thread-local because the underlying httplib2 connection is not
+# thread-safe, and the async agent may run several tools at the same time.
+_service_cache = threading.local()
+
+def _get_credentials():
+    """
+    Returns the shared Google OAuth credentials, refreshing the access token in place once it has expired.
+    """
+    global _credentials
+    with _credentials_lock:
+        # 1. Read and parse 'token.json' on first use only
+        if _credentials is None:
+            _credentials = Credentials.from_authorized_user_file('token.json', SCOPES)
+
+        # 2. Refresh the (roughly hourly) access token only when it is actually expired
+        if _credentials.expired and _credentials.refresh_token:
+            _credentials.refresh(Request())
+        return _credentials
+
+def _get_service():
+    """
+    Returns an authenticated Google Calendar API client for the current thread.
+
+    The client is built once per thread around the shared credentials, so a token refresh updates
+    every cached client at once and no client ever has to be rebuilt.
+    """
+    # 1. Make sure the shared token is valid before any request goes out
+    creds = _get_credentials()
+
+    # 2. Build this thread's client on first use. 'static_discovery=True' uses the discovery document
+    # shipped with the library (no HTTPS fetch), and 'cache_discovery=False' skips the warning-prone file cache
+    service = getattr(_service_cache, "service", None)
+    if service is None:
+        service = build('calendar', 'v3', credentials=creds, cache_discovery=False, static_discovery=True)
+        _service_cache.service = service
+    return service
+
+# ==========================================
+# TRANSIENT FAILURE RETRIES
+# ==========================================
+# Rate limits (429) and server hiccups (5xx) are retried a few times with exponential backoff and jitter
+# INSIDE the tool. Surfacing them as errors would make the agent re-invoke the tool immediately, turning one
+# transient failure into a retry storm. Any other HTTP error is permanent and is raised right away.
+_RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+_MAX_ATTEMPTS = 3
+
+def _is_retryable(error: Exception) -> bool:
+    return isinstance(error, HttpError) and error.resp.status in _RETRYABLE_STATUSES
+
+def _backoff(attempt: int):
+    # ~0.25 s, then ~0.5 s (plus up to 0.1 s of jitter so concurrent tools do not retry in lockstep)
+    time.sleep((2 ** attempt) * 0.25 + random.random() * 0.1)
+
+def _execute_with_retry(request):
+    """
+    Executes a single Google API request, retrying transient HTTP failures.
+
+    Args:
+        request (googleapiclient.http.HttpRequest): The prepared API request.
+
+    Returns:
+        dict: The decoded API response.
+    """
+    for attempt in range(_MAX_ATTEMPTS):
+        try:
+            return request.execute()
+        except HttpError as e:
+            if _is_retryable(e) and attempt < _MAX_ATTEMPTS - 1:
+                _backoff(attempt)
+                continue
+            raise
+
+def _execute_batch_with_retry(service, requests: dict):
+    """
+    Executes several Google API requests in one batch HTTP request, re-batching only the
+    sub-requests that failed transiently.
+
+    Args:
+        service (googleapiclient.discovery.Resource): The authenticated API client.
+        requests (dict): Prepared API requests keyed by a caller-chosen ID.
+
+    Returns:
+        tuple: (responses, errors) dictionaries keyed by the same IDs. A request appears in
+        'errors' when it failed permanently or was still failing after the last attempt.
+    """
+    responses, errors = {}, {}
+    pending = requests
+
+    for attempt in range(_MAX_ATTEMPTS):
+        def collect(request_id, response, exception):
+            if exception is None:
+                responses[request_id] = response
+                errors.pop(request_id, None)
+            else:
+                errors[request_id] = exception
+
+        # 1. Send every pending sub-request in a single round-trip
+        batch = service.new_batch_http_request(callback=collect)
+        for request_id, request in pending.items():
+            batch.add(request, request_id=request_id)
+        try:
+            batch.execute()
+        except HttpError as e:
+            # The whole batch was rejected, so every pending sub-request shares its fate
+            for request_id in pending:
+                errors[request_id] = e
+
+        # 2. Retry only the sub-requests that failed transiently
+        pending = {request_id: pending[request_id] for request_id in pending if _is_retryable(errors.get(request_id))}
+        if not pending or attempt == _MAX_ATTEMPTS - 1:
+            break
+        _backoff(attempt)
+
+    return responses, errors
+
+# ==========================================
+# TOOL RESPONSE CACHE
+# ==========================================
+# The agent often re-invokes a tool with the exact same arguments within one turn (self-correction,
+# multi-step planning), so identical calls are answered from memory for a short, per-tool lifetime.
+# Every successful response is also kept in a long-lived stale cache that is served (clearly marked)
+# only when Google Calendar fails, instead of surfacing the raw error to the agent.
+# 'TTLCache' is not thread-safe and the tools run in worker threads, hence the lock.
+_fresh_caches = []
+_stale_cache = TTLCache(maxsize=256, ttl=600)
+_cache_lock = threading.Lock()
+
+# Bumped by every invalidation. A read that overlapped a write (e.g., both issued in the same agent step)
+# may have fetched pre-write data, so its response is not stored if the generation changed meanwhile.
+_cache_generation = 0
+
+# Prefix shared by the tools' graceful error strings (never cached, see 'with_calendar_service')
+_TOOL_ERROR_PREFIX = "Error"
+_STALE_MARKER = "(stale) Google Calendar is temporarily unreachable, showing the last known result:\n"
+
+def cached_tool_response(ttl: int):
+    """
+    Caches a tool's string response keyed on its arguments, with a stale fallback on API failure.
+
+    Args:
+        ttl (int): How many seconds an identical call is answered from memory.
+
+    Returns:
+        Callable: A decorator preserving the wrapped tool's signature and docstring (the LLM schema).
+    """
+    def decorator(func):
+        fresh_cache = TTLCache(maxsize=256, ttl=ttl)
+        _fresh_caches.append(fresh_cache)
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # 1. Normalize positional/keyword calls into one key: (tool name, *argument values)
+            key = (func.__name__, *signature.bind(*args, **kwargs).arguments.values())
+            with _cache_lock:
+                if key in fresh_cache:
+                    return fresh_cache[key]
+                generation = _cache_generation
+
+            # 2. Cache miss: run the real tool
+            response = func(*args, **kwargs)
+
+            with _cache_lock:
+                # 3. On API failure, fall back to the last known good response if there is one
+                if response.startswith(_TOOL_ERROR_PREFIX):
+                    stale = _stale_cache.get(key)
+                    return _STALE_MARKER + stale if stale is not None else response
+
+                # 4. Store the fresh response for both the short-lived and the stale cache,
+                # unless a calendar write was invalidated while this call was in flight
+                if generation == _cache_generation:
+                    fresh_cache[key] = response
+                    _stale_cache[key] = response
+            return response
+
+        return wrapper
+    return decorator
+
+def clear_schedule_cache():
+    """
+    Drops every fresh cached response. Must be called after any calendar write (create/update/move/delete)
+    so the next read reflects the change. The stale fallback entries are kept on purpose.
+    """
+    global _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+        for fresh_cache in _fresh_caches:
+            fresh_cache.clear()
+
+def _event_start_key(e):
+    """
+    Sort key for events by start. Both forms are plain strings rendered in the same timezone
+    ('timeZone' is pinned on every request), so they compare chronologically; an all-day
+    'YYYY-MM-DD' sorts before the timed events of that same day.
+    """
+    s = e['start']
+    return s.get('dateTime') or s.get('date') or ''
+
+def _format_event_line(e: dict, with_id: bool) -> str:
+    """
+    Formats a single Calendar API event as one newline-terminated response line.
+
+    Args:
+        e (dict): The event resource (partial response with 'summary', 'start', 'end' and optionally 'id').
+        with_id (bool): Append the 'EVENT_ID' (needed for edits/deletions).
+
+    Returns:
+        str: e.g. "- [2025-01-05] 'Dentist' (09:00 - 10:00) | EVENT_ID: abc123\n" or "- [2025-01-05] Dentist (All-day)\n"
+    """
+    title = e.get('summary') or 'Untitled Event'  # Also covers an empty title
+
+    # Extract raw date/time strings from the API payload (one lookup per dict,
+    # short-circuiting on the common time-bound 'dateTime' case)
+    s = e['start']
+    en = e['end']
+    start_raw = s.get('dateTime') or s.get('date')
+    end_raw = en.get('dateTime') or en.get('date')
+
+    # Determine if the event is time-bound ('HH:MM - HH:MM') or an all-day occurrence
+    # ('YYYY-MM-DD' dates are exactly 10 chars; anything longer is a full 'dateTime')
+    time_str = f"{start_raw[11:16]} - {end_raw[11:16]}" if len(start_raw) > 10 else "All-day"
+
+    if with_id:
+        # Date, Title, Time, and ID in one single line
+        # ('id' is always present, it is requested in the partial response)
+        return f"- [{start_raw[:10]}] '{title}' ({time_str}) | EVENT_ID: {e['id']}\n"
+    # Notice: NO EVENT_ID here to keep UI clean
+    return f"- [{start_raw[:10]}] {title} ({time_str})\n"
+
+def _format_events(header: str, events: list, include_id: bool):
+    """
+    Lazily formats a tool response: the header line, then one line per event.
+
+    Callers join the lines exactly once, so no intermediate response string is ever built.
+
+    Args:
+        header (str): The first line of the response (already newline-terminated).
+        events (list): Calendar API event resources.
+        include_id (bool): Append the 'EVENT_ID' (needed for edits/deletions) to every line.
+
+    Yields:
+        str: The header, then one newline-terminated line per event.
+    """
+    yield header
+    yield from (_format_event_line(e, include_id) for e in events)
+
+# ==========================================
+# CALENDAR SERVICE INJECTION
+# ==========================================
+def with_calendar_service(func):
+    """
+    Injects the cached, authenticated Google Calendar API client as the tool's first argument and turns
+    API/network failures into a graceful error string for the AI agent.
+
+    The 'service' parameter is hidden from the published signature, so LangChain's '@tool' builds the
+    LLM-facing schema from the remaining arguments only.
+
+    Args:
+        func (Callable): A tool body whose first parameter is 'service'.
+
+    Returns:
+        Callable: The wrapped tool.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(_get_service(), *args, **kwargs)
+        except (HttpError, httplib2.HttpLib2Error, TransportError, OSError) as e:
+            # Only API/network failures are caught (and answered from the stale cache when possible),
+            # including a network drop while refreshing the token ('TransportError');
+            # bugs and revoked credentials ('RefreshError') still propagate to the bot's error handler
+            return f"Error executing {func.__name__}: {str(e)}"
+
+    signature = inspect.signature(func)
+    wrapper.__signature__ = signature.replace(parameters=list(signature.parameters.values())[1:])
+    return wrapper
+
 # ==========================================
 # AI TOOL: EVENT ID SEARCHER (THE SNIPER)
 # ==========================================
 @tool
-def get_id_of_schedules(keyword: str) -> str:
+@cached_tool_response(ttl=10)  # Short lifetime: event IDs change whenever events are edited
+@with_calendar_service
+def get_id_of_schedules(service, keyword: str) -> str:
     """
     USE THIS TOOL TO FIND THE 'EVENT_ID' BEFORE DELETING OR EDITING AN EVENT. 
     Provide a specific keyword or the name of the event (e.g., 'Meeting' or 'Dentist').
+    To look up SEVERAL events at once, pass all keywords in ONE call separated by commas (e.g., 'Meeting, Dentist, Standup')
+    instead of calling this tool once per keyword.
     It searches the primary calendar and returns a list of matching events with their dates, times, and unique IDs.
     """
-    try:
-        # 1. Authenticate with the Google Calendar API using the predefined scopes.
-        creds = Credentials.from_authorized_user_file('token.json', ['https://www.googleapis.com/auth/calendar'])
-        service = build('calendar', 'v3', credentials=creds)
-
-        # 2. Execute a free-text search query ('q') against the primary calendar
-        result = service.events().list(
+    def search(query):
+        # Free-text search query ('q') against the primary calendar
+        return service.events().list(
             calendarId="primary",
-            q=keyword,          # The search keyword provided by the AI
+            q=query,            # The search keyword provided by the AI
             maxResults=10,      # Limit the results to prevent token overflow
             singleEvents=True,  # Expand recurring events into single instances
-            orderBy='startTime',
-            timeZone='Asia/Jakarta'
-        ).execute()
-
-        # 3. Extract the array of events from the API payload
-        events = result.get("items", [])
-        
-        # 4. Handle the edge case where no events match the search query
-        if not events:
-            return f"No events found matching the keyword: '{keyword}'."
-
-        # 5. Format the output string so the LLM can easily read the Date, Title, Time, and ID
-        response = f"Matching Events Found for '{keyword}':\n"
-        
-        for e in events:
-            title = e.get('summary', 'Untitled Event')
-            event_id = e.get('id', 'NO_ID_FOUND')
-            
-            # Extract raw date/time strings from the API payload
-            start_raw = e['start'].get('dateTime', e['start'].get('date'))
-            end_raw = e['end'].get('dateTime', e['end'].get('date'))
-
-            # Extract just the 'YYYY-MM-DD' portion for AI context
-            event_date = start_raw[:10]
-
-            # Determine if the event is time-bound or an all-day occurrence
-            if "T" in start_raw:
-                start_time = start_raw[11:16] # Extract HH:MM
-                end_time = end_raw[11:16]
-                time_str = f"{start_time} - {end_time}"
-            else:
-                time_str = "All-day"
+            orderBy='startTime',  # Required so 'maxResults' keeps the EARLIEST matches, not an arbitrary subset
+            timeZone='Asia/Jakarta',
+            # Partial response: download only the fields this tool reads, not the full event resource
+            fields="items(id,summary,start(dateTime,date),end(dateTime,date))"
+        )
 
-            # Append the fully formatted event entry (Date, Title, Time, and ID in one single line)
-            response += f"- [{event_date}] '{title}' ({time_str}) | EVENT_ID: {event_id}\n"
-            
-        return response
+    # 1. Split comma/newline-separated keywords so several lookups cost a single round-trip
+    keywords = [k.strip() for k in re.split(r'[,\n]', keyword) if k.strip()]
 
-    except Exception as e:
-        # 6. Return a graceful error message back to the AI agent if the API call fails
-        return f"Error executing search tool: {str(e)}"
+    if len(keywords) <= 1:
+        # 2a. Single keyword: one plain request (retrying transient failures), using the cleaned keyword
+        # so e.g. 'Dentist,' searches for 'Dentist'
+        events = _execute_with_retry(search(keywords[0] if keywords else keyword)).get("items", [])
+    else:
+        # 2b. Several keywords: fan out inside ONE batch HTTP request, then merge the results
+        responses, errors = _execute_batch_with_retry(service, {str(i): search(k) for i, k in enumerate(keywords)})
+        if errors:
+            raise next(iter(errors.values()))
+
+        # Merge in keyword order, dropping events matched by more than one keyword
+        events, seen_ids = [], set()
+        for i in range(len(keywords)):
+            for e in responses[str(i)].get("items", []):
+                if e['id'] not in seen_ids:
+                    seen_ids.add(e['id'])
+                    events.append(e)
+
+    # Each response is already ordered; sort the merged keyword results chronologically as well
+    events.sort(key=_event_start_key)
+
+    # 3. Handle the edge case where no events match the search query
+    if not events:
+        return f"No events found matching the keyword: '{keyword}'."
+
+    # 4. Format the output string so the LLM can easily read the Date, Title, Time, and ID
+    return "".join(_format_events(f"Matching Events Found for '{keyword}':\n", events, include_id=True))
 
 # ==========================================
 # AI TOOL: DATE RANGE SCHEDULE FETCHER
 # ==========================================
 @tool
-def get_all_schedules(start_date: str, end_date: str) -> str:
+@cached_tool_response(ttl=30)
+@with_calendar_service
+def get_all_schedules(service, start_date: str, end_date: str) -> str:
     """
     USE THIS TOOL TO RETRIEVE ALL SCHEDULED EVENTS AND HOLIDAYS WITHIN A SPECIFIC DATE RANGE.
     The 'start_date' and 'end_date' inputs MUST be strictly in 'YYYY-MM-DD' format.
     If the user asks for a single day's schedule (e.g., "today"), provide the exact same date for both inputs.
     """
+    # 1. Validate and normalize the LLM-supplied dates locally (' 2025-1-5' becomes '2025-01-05'), so malformed
+    # input or an inverted range costs a cheap local check instead of a full Google API round-trip ending in a 400
     try:
-        # 1. Authenticate with the Google Calendar API using the predefined scopes.
-        creds = Credentials.from_authorized_user_file('token.json', ['https://www.googleapis.com/auth/calendar'])
-        service = build('calendar', 'v3', credentials=creds)
-        
-        # 2. Format the time boundaries (Appending +07:00 for WIB/Jakarta Timezone)
-        timeMin = f"{start_date}T00:00:00+07:00"
-        timeMax = f"{end_date}T23:59:59+07:00"
-
-        # 3. Define the list of target calendars (Primary user calendar & Indonesian Holidays)
-        target_calendars = ['primary', 'id.indonesian#holiday@group.v.calendar.google.com']
-        all_events = []
-
-        # 4. Iterate through each calendar and aggregate the matching events
-        for calendar_id in target_calendars:
-            try: 
-                result = service.events().list(
-                    calendarId=calendar_id,
-                    timeMin=timeMin,
-                    timeMax=timeMax,
-                    maxResults=50,      # Increased limit to accommodate multi-day ranges
-                    singleEvents=True,  # Expand recurring events into single instances
-                    orderBy='startTime',
-                    timeZone='Asia/Jakarta'
-                ).execute()
-                all_events.extend(result.get("items", []))
-            except:
-                # Silently skip if a specific calendar is inaccessible or fails
-                continue
+        sd = datetime.strptime(start_date.strip(), "%Y-%m-%d").date()
+        ed = datetime.strptime(end_date.strip(), "%Y-%m-%d").date()
+    except ValueError:
+        return f"Error: dates must be YYYY-MM-DD, got {start_date!r}/{end_date!r}"
+    start_day, end_day = sd.isoformat(), ed.isoformat()  # Normalized 'YYYY-MM-DD' strings
+    if sd > ed:
+        return f"Error: start_date {start_day} is after end_date {end_day}"
 
-        # 5. Handle the edge case where no events are found in the given timeframe
-        if not all_events:
-            return f"No events scheduled from {start_date} to {end_date}."
-
-        # 6. Format the aggregated events into a clean, readable string for both UI and AI context
-        response = f"Schedule from {start_date} to {end_date}:\n"
-        
-        for e in all_events:
-            title = e.get('summary', 'Untitled Event')
-            
-            # Extract raw date/time strings from the API payload
-            start_raw = e['start'].get('dateTime', e['start'].get('date'))
-            end_raw = e['end'].get('dateTime', e['end'].get('date'))
-
-            # Extract just the 'YYYY-MM-DD' portion for clear visual grouping
-            event_date = start_raw[:10]
-
-            # Determine if the event is time-bound or an all-day occurrence
-            if "T" in start_raw:
-                start_time = start_raw[11:16] # Extract HH:MM
-                end_time = end_raw[11:16]
-                time_str = f"{start_time} - {end_time}"
-            else:
-                time_str = "All-day"
+    # 2. Format the time boundaries as RFC3339 in WIB/Jakarta Timezone (e.g., '2025-01-05T00:00:00+07:00')
+    # by appending the precomputed suffixes to the normalized dates
+    timeMin = start_day + _WIB_DAY_START
+    timeMax = end_day + _WIB_DAY_END
+
+    # 3. Define the list of target calendars (Primary user calendar & Indonesian Holidays)
+    target_calendars = ['primary', 'id.indonesian#holiday@group.v.calendar.google.com']
+
+    # 4. Queue one query per calendar into a SINGLE batch HTTP request (multipart/mixed).
+    # All calendars travel in one round-trip and are processed in parallel server-side;
+    # sub-requests that hit a transient error (429/5xx) are re-batched with backoff.
+    responses, errors = _execute_batch_with_retry(service, {
+        calendar_id: service.events().list(
+            calendarId=calendar_id,
+            timeMin=timeMin,
+            timeMax=timeMax,
+            maxResults=50,      # Increased limit to accommodate multi-day ranges
+            singleEvents=True,  # Expand recurring events into single instances
+            orderBy='startTime',  # Required so 'maxResults' keeps the EARLIEST events, not an arbitrary subset
+            timeZone='Asia/Jakarta',
+            # Partial response: no IDs are shown here, so only the displayed fields are fetched
+            fields="items(summary,start(dateTime,date),end(dateTime,date))"
+        )
+        for calendar_id in target_calendars
+    })
+
+    # The user's own calendar is essential; a failing secondary calendar (holidays) is silently skipped
+    if 'primary' in errors:
+        raise errors['primary']
+
+    # Aggregate the results of every calendar that answered
+    all_events = []
+    for calendar_id in target_calendars:
+        if calendar_id in responses:
+            all_events.extend(responses[calendar_id].get("items", []))
+
+    # Each calendar is already ordered; sort the merged list to interleave holidays with the user's own events
+    all_events.sort(key=_event_start_key)
 
-            # Append the formatted event entry (Notice: NO EVENT_ID here to keep UI clean)
-            response += f"- [{event_date}] {title} ({time_str})\n"
-            
-        return response
+    # 5. Handle the edge case where no events are found in the given timeframe
+    if not all_events:
+        return f"No events scheduled from {start_day} to {end_day}."
 
-    except Exception as e:
-        # 7. Gracefully return the error back to the AI agent
-        return f"Error executing schedule fetcher: {str(e)}"
\ No newline at end of file
+    # 6. Format the aggregated events into a clean, readable string for both UI and AI context
+    return "".join(_format_events(f"Schedule from {start_day} to {end_day}:\n", all_events, include_id=False))